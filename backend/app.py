@@ -37,8 +37,23 @@ def api_respond():
 @app.get("/backend/static/<path:filename>")
 def serve_backend_static(filename):
     static_dir = os.path.join(BACKEND_DIR, "static")
-    return send_from_directory(static_dir, filename)
+    response = send_from_directory(static_dir, filename, conditional=True)
 
-if __name__ == "__main__": 
+    # Generated marker images have deterministic mtime-keyed names, so they
+    # never change under the same URL and can be cached indefinitely.
+    if filename.startswith("generated/"):
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+
+    return response
+
+if __name__ == "__main__":
     port = int(os.environ.get("PORT", "8080"))
-    app.run(host="0.0.0.0", port=port, debug=False)
+    try:
+        # Werkzeug's dev server is single-threaded, so one slow OCR render
+        # would stall every other request; waitress gives a real thread pool.
+        from waitress import serve
+        serve(app, host="0.0.0.0", port=port, threads=8)
+    except ImportError:
+        app.run(host="0.0.0.0", port=port, debug=False)
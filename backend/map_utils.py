@@ -1,5 +1,10 @@
+import functools
+import hashlib
+import json
+import logging
 import os
-import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 
 import cv2
@@ -7,6 +12,22 @@ import numpy as np
 import pytesseract
 from PIL import Image, ImageDraw
 
+# tesserocr keeps one Tesseract instance in-process, avoiding the
+# subprocess spawn + stdio round-trip pytesseract pays on every call.
+try:
+    from tesserocr import OEM, PSM, RIL, PyTessBaseAPI, iterate_level
+except ImportError:
+    PyTessBaseAPI = None
+
+# pandas lets pytesseract hand back a C-parsed dataframe instead of
+# building six Python lists out of Tesseract's TSV.
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+logger = logging.getLogger(__name__)
 
 BACKEND_DIR = os.path.abspath(os.path.dirname(__file__))
 STATIC_DIR = os.path.join(BACKEND_DIR, "static")
@@ -14,6 +35,7 @@ GEN_DIR = os.path.join(STATIC_DIR, "generated")
 os.makedirs(GEN_DIR, exist_ok=True)
 
 
+@functools.lru_cache(maxsize=32)
 def _find_floor_map_path(floor: str) -> Optional[str]:
     floor = str(floor).strip()
     candidates = [
@@ -28,47 +50,112 @@ def _find_floor_map_path(floor: str) -> Optional[str]:
     return None
 
 
-def _resolve_floor_for_gallery(gallery: str, map_locations: List[Dict[str, Any]]) -> Optional[str]:
-    g = str(gallery).upper().strip()
+# gallery -> floor, built once per map_locations object (it's loaded once at startup)
+_GALLERY_TO_FLOOR_CACHE: Dict[int, Dict[str, str]] = {}
 
-    for floor_obj in map_locations:
-        floor = str(floor_obj.get("floor", "")).strip()
-        for block in (floor_obj.get("galleries") or []):
-            nums = block.get("numbers") or []
-            for n in nums:
-                if str(n).upper().strip() == g:
-                    return floor
-    return None
 
+def build_gallery_to_floor(map_locations: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Flatten map_locations into a gallery-number -> floor lookup, built once."""
+    lookup = _GALLERY_TO_FLOOR_CACHE.get(id(map_locations))
+    if lookup is None:
+        lookup = {
+            str(n).upper().strip(): str(floor_obj.get("floor", "")).strip()
+            for floor_obj in map_locations
+            for block in (floor_obj.get("galleries") or [])
+            for n in (block.get("numbers") or [])
+        }
+        _GALLERY_TO_FLOOR_CACHE[id(map_locations)] = lookup
+    return lookup
 
-def _preprocess_variants(img_bgr: np.ndarray) -> List[Tuple[np.ndarray, float]]:
-    gray0 = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
 
-    variants: List[Tuple[np.ndarray, float]] = []
+def _resolve_floor_for_gallery(gallery: str, map_locations: List[Dict[str, Any]]) -> Optional[str]:
+    return build_gallery_to_floor(map_locations).get(str(gallery).upper().strip())
+
+
+_OCR_TARGET_HEIGHT = 1024
+_MORPH_KERNEL = np.ones((2, 2), np.uint8)
+_JOIN_KERNEL = np.ones((1, 5), np.uint8)
+
+# Run the heavy image kernels (resize, blur) on the GPU when an OpenCV
+# CUDA build with a device is present; everything falls back to CPU.
+try:
+    _CUDA_AVAILABLE = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except Exception:
+    _CUDA_AVAILABLE = False
+
+_CUDA_BLUR = None
+if _CUDA_AVAILABLE:
+    try:
+        _CUDA_BLUR = cv2.cuda.createGaussianFilter(cv2.CV_8UC1, cv2.CV_8UC1, (3, 3), 0)
+    except Exception:
+        _CUDA_AVAILABLE = False
+
+
+def _gpu_resize_blur(gray0: np.ndarray, out_w: int, out_h: int, interp: int) -> Optional[np.ndarray]:
+    try:
+        gpu = cv2.cuda_GpuMat()
+        gpu.upload(gray0)
+        gpu = cv2.cuda.resize(gpu, (out_w, out_h), interpolation=interp)
+        gpu = _CUDA_BLUR.apply(gpu)
+        return gpu.download()
+    except Exception:
+        return None
 
-    for scale in (1.5, 2.0, 2.5, 3.0):
-        resized = cv2.resize(gray0, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
 
-        _, th_otsu = cv2.threshold(resized, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+def _preprocess_variants(img_bgr: np.ndarray, adaptive: bool = False) -> List[Tuple[np.ndarray, float]]:
+    gray0 = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
 
-        th_adapt = cv2.adaptiveThreshold(
-            resized, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 9
+    # One good variant (resize to ~1024 px tall, blur, Otsu) gets most of the
+    # OCR accuracy; the adaptive threshold is only used as a fallback pass.
+    # OCR cost scales with pixel count, so cap upscaling and shrink
+    # oversized source maps instead of blowing them up further.
+    scale = min(_OCR_TARGET_HEIGHT / float(gray0.shape[0]), 2.5)
+    out_w = int(round(gray0.shape[1] * scale))
+    out_h = int(round(gray0.shape[0] * scale))
+
+    interp = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+
+    # Reuse one buffer for resize/blur/threshold instead of allocating a
+    # fresh ndarray per step.
+    buf = None
+    if _CUDA_AVAILABLE and not adaptive:
+        buf = _gpu_resize_blur(gray0, out_w, out_h, interp)
+        blurred = buf is not None
+
+    if buf is None:
+        blurred = False
+        buf = np.empty((out_h, out_w), dtype=np.uint8)
+        cv2.resize(gray0, (out_w, out_h), dst=buf, interpolation=interp)
+
+    if adaptive:
+        th = cv2.adaptiveThreshold(
+            buf, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 9
         )
+    else:
+        if not blurred:
+            cv2.GaussianBlur(buf, (3, 3), 0, dst=buf)
+        _, th = cv2.threshold(buf, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=buf)
+
+    cv2.morphologyEx(
+        th, cv2.MORPH_OPEN, _MORPH_KERNEL, dst=th,
+        iterations=1, borderType=cv2.BORDER_REPLICATE,
+    )
 
-        k = np.ones((2, 2), np.uint8)
-        th_otsu = cv2.morphologyEx(th_otsu, cv2.MORPH_OPEN, k, iterations=1)
-        th_adapt = cv2.morphologyEx(th_adapt, cv2.MORPH_OPEN, k, iterations=1)
+    return [(th, scale)]
 
-        variants.append((th_otsu, scale))
-        variants.append((th_adapt, scale))
 
-    return variants
+# Single translate() pass beats the old per-character generator join;
+# this runs once per surviving OCR row.
+_OCR_TOKEN_TABLE = {o: None for o in range(128) if not chr(o).isalnum()}
 
 
 def _normalize_ocr_token(t: str) -> str:
-    t = (t or "").strip().upper()
-    t = "".join(ch for ch in t if ch.isalnum())
-    return t
+    t = t or ""
+    if not t.isascii():
+        # Tesseract can emit non-ASCII junk (dashes, ligatures); the
+        # translate table only covers ASCII, so strip the rest first.
+        t = t.encode("ascii", "ignore").decode("ascii")
+    return t.upper().translate(_OCR_TOKEN_TABLE)
 
 
 def _score_match(token: str, target: str, conf: float) -> float:
@@ -83,53 +170,241 @@ def _score_match(token: str, target: str, conf: float) -> float:
     return sim * 0.75 + max(0.0, min(conf, 100.0)) * 0.25
 
 
-def _ocr_find_center(image_path: str, target: str) -> Optional[Tuple[int, int]]:
-    target = _normalize_ocr_token(str(target))
+_TESS_WHITELIST = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_TESS_CONFIG = rf"--oem 3 --psm 6 -c tessedit_char_whitelist={_TESS_WHITELIST}"
+_TESS_CROP_CONFIG = rf"--oem 3 --psm 8 -c tessedit_char_whitelist={_TESS_WHITELIST}"
+
+_TESS_API = None
+_TESS_LOCK = threading.Lock()  # PyTessBaseAPI is not thread-safe
+
+if PyTessBaseAPI is not None:
+    try:
+        _TESS_API = PyTessBaseAPI(psm=PSM.SINGLE_BLOCK, oem=OEM.DEFAULT)
+        _TESS_API.SetVariable("tessedit_char_whitelist", _TESS_WHITELIST)
+    except Exception:
+        _TESS_API = None
+
+
+_OcrColumns = Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _ocr_words(proc: np.ndarray) -> _OcrColumns:
+    """Return (texts, confs, lefts, tops, widths, heights) columns for every detected word."""
+    if _TESS_API is not None:
+        texts: List[str] = []
+        rows: List[Tuple[float, int, int, int, int]] = []
+        with _TESS_LOCK:
+            _TESS_API.SetPageSegMode(PSM.SINGLE_BLOCK)
+            _TESS_API.SetImage(Image.fromarray(proc))
+            _TESS_API.Recognize()
+            it = _TESS_API.GetIterator()
+            if it is not None:
+                for w in iterate_level(it, RIL.WORD):
+                    try:
+                        text = w.GetUTF8Text(RIL.WORD)
+                        conf = float(w.Confidence(RIL.WORD))
+                        x0, y0, x1, y1 = w.BoundingBox(RIL.WORD)
+                    except RuntimeError:
+                        continue
+                    texts.append(text)
+                    rows.append((conf, x0, y0, x1 - x0, y1 - y0))
+        cols = np.asarray(rows, dtype=np.float32).reshape(-1, 5)
+        return (texts, cols[:, 0], cols[:, 1], cols[:, 2], cols[:, 3], cols[:, 4])
+
+    if pd is not None:
+        df = pytesseract.image_to_data(
+            proc, output_type=pytesseract.Output.DATAFRAME, config=_TESS_CONFIG
+        )
+        df = df.dropna(subset=["text"])
+        return (
+            df["text"].astype(str).tolist(),
+            df["conf"].to_numpy(dtype=np.float32),
+            df["left"].to_numpy(dtype=np.float32),
+            df["top"].to_numpy(dtype=np.float32),
+            df["width"].to_numpy(dtype=np.float32),
+            df["height"].to_numpy(dtype=np.float32),
+        )
 
-    img = cv2.imread(image_path)
-    if img is None:
+    data = pytesseract.image_to_data(proc, output_type=pytesseract.Output.DICT, config=_TESS_CONFIG)
+
+    def _col(name: str) -> np.ndarray:
+        return np.asarray([float(v) if str(v).strip() else 0.0 for v in data.get(name, [])], dtype=np.float32)
+
+    return (
+        data.get("text", []),
+        _col("conf"),
+        _col("left"),
+        _col("top"),
+        _col("width"),
+        _col("height"),
+    )
+
+
+def _ocr_single_word(crop: np.ndarray) -> str:
+    if _TESS_API is not None:
+        with _TESS_LOCK:
+            _TESS_API.SetPageSegMode(PSM.SINGLE_WORD)
+            _TESS_API.SetImage(Image.fromarray(crop))
+            return _TESS_API.GetUTF8Text()
+
+    return pytesseract.image_to_string(crop, config=_TESS_CROP_CONFIG)
+
+
+def _candidate_label_regions(th: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """Shortlist bounding boxes that look like gallery-number labels.
+
+    Connected components on the (inverted) thresholded image, with adjacent
+    characters joined into word blobs, filtered by the height and aspect
+    ratio a label can plausibly have at this resolution.
+    """
+    inv = cv2.bitwise_not(th)
+    joined = cv2.dilate(inv, _JOIN_KERNEL, dst=inv, iterations=1)
+
+    n, _, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+
+    h_img = th.shape[0]
+    min_h = max(6, h_img // 150)
+    max_h = h_img // 20
+
+    regions: List[Tuple[int, int, int, int]] = []
+    for i in range(1, n):
+        x, y, w, h = stats[i][0], stats[i][1], stats[i][2], stats[i][3]
+        if not (min_h <= h <= max_h):
+            continue
+        aspect = w / float(h)
+        if not (0.3 <= aspect <= 3.0):
+            continue
+        regions.append((int(x), int(y), int(w), int(h)))
+
+    return regions
+
+
+# Tesseract releases the GIL inside its C call, so independent crops can
+# be OCR'd concurrently. (With tesserocr, _TESS_LOCK serializes the API.)
+_OCR_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+
+def _scan_candidates(proc: np.ndarray, scale: float, target: str) -> Optional[Tuple[float, int, int]]:
+    regions = _candidate_label_regions(proc)
+    if not regions:
+        return None
+
+    pad = 4
+
+    def _ocr_region(region: Tuple[int, int, int, int]) -> Optional[Tuple[float, int, int]]:
+        x, y, w, h = region
+        crop = proc[max(0, y - pad):y + h + pad, max(0, x - pad):x + w + pad]
+
+        tok = _normalize_ocr_token(_ocr_single_word(crop))
+        if not tok:
+            return None
+
+        score = _score_match(tok, target, 0.0)
+        if score <= 0:
+            return None
+
+        cx = int(round((x + w / 2.0) / scale))
+        cy = int(round((y + h / 2.0) / scale))
+        return (score, cx, cy)
+
+    results = [r for r in _OCR_EXECUTOR.map(_ocr_region, regions) if r is not None]
+    if not results:
         return None
+    return max(results, key=lambda r: r[0])
+
 
-    best = None 
-    config = r"--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+def _scan_variants(variants: List[Tuple[np.ndarray, float]], target: str) -> Optional[Tuple[float, int, int]]:
+    best = None
 
-    for proc, scale in _preprocess_variants(img):
-        data = pytesseract.image_to_data(proc, output_type=pytesseract.Output.DICT, config=config)
+    for proc, scale in variants:
+        texts, confs, xs, ys, ws, hs = _ocr_words(proc)
+        if not texts:
+            continue
 
-        texts = data.get("text", [])
-        confs = data.get("conf", [])
-        xs = data.get("left", [])
-        ys = data.get("top", [])
-        ws = data.get("width", [])
-        hs = data.get("height", [])
+        # Vectorize the per-word scoring: Tesseract can emit thousands of
+        # rows on a busy map, and the conf >= 30 mask drops most of them
+        # before any Python-level string work happens.
+        keep = np.nonzero(confs >= 30.0)[0]
+        if keep.size == 0:
+            continue
 
-        for i in range(len(texts)):
-            tok = _normalize_ocr_token(texts[i])
+        toks = [_normalize_ocr_token(texts[i]) for i in keep]
+
+        sim = np.zeros(keep.size, dtype=np.float32)
+        for i, tok in enumerate(toks):
             if not tok:
                 continue
+            if tok == target:
+                sim[i] = 100.0
+            elif tok in target or target in tok:
+                sim[i] = 85.0
 
-            try:
-                conf = float(confs[i])
-            except Exception:
-                conf = 0.0
+        scores = sim * 0.75 + np.clip(confs[keep], 0.0, 100.0) * 0.25
+        scores[sim == 0.0] = 0.0
 
-            score = _score_match(tok, target, conf)
-            if score <= 0:
-                continue
+        j = int(np.argmax(scores))
+        if scores[j] <= 0:
+            continue
 
-            cx_p = xs[i] + ws[i] / 2.0
-            cy_p = ys[i] + hs[i] / 2.0
+        k = keep[j]
+        cx = int(round((xs[k] + ws[k] / 2.0) / scale))
+        cy = int(round((ys[k] + hs[k] / 2.0) / scale))
 
-            cx = int(round(cx_p / scale))
-            cy = int(round(cy_p / scale))
+        if best is None or scores[j] > best[0]:
+            best = (float(scores[j]), cx, cy)
 
-            if best is None or score > best[0]:
-                best = (score, cx, cy)
+        # exact match at high confidence can't be beaten materially
+        if best[0] >= 95.0:
+            return best
 
-    if best and best[0] >= 70.0:
-        return (best[1], best[2])
+    return best
+
+
+# (image_path, mtime, target) -> center; floor maps are static, so OCR once per label
+_OCR_CENTER_CACHE: Dict[Tuple[str, float, str], Optional[Tuple[int, int]]] = {}
 
-    return None
+
+def _ocr_find_center(image_path: str, target: str) -> Optional[Tuple[int, int]]:
+    target = _normalize_ocr_token(str(target))
+
+    # Gallery labels are short alphanumeric codes; anything else can't
+    # match and isn't worth a Tesseract run.
+    if not target or len(target) > 6:
+        return None
+
+    try:
+        mtime = os.path.getmtime(image_path)
+    except OSError:
+        mtime = 0.0
+
+    cache_key = (image_path, mtime, target)
+    if cache_key in _OCR_CENTER_CACHE:
+        return _OCR_CENTER_CACHE[cache_key]
+
+    img = cv2.imread(image_path)
+    if img is None:
+        logger.warning("Could not read map image %s", image_path)
+        return None
+
+    variants = _preprocess_variants(img)
+
+    # OCR only small candidate crops first; the full-image passes are fallbacks.
+    proc, scale = variants[0]
+    best = _scan_candidates(proc, scale, target)
+
+    if best is None or best[0] < 70.0:
+        full = _scan_variants(variants, target)
+        if full and (best is None or full[0] > best[0]):
+            best = full
+
+    if best is None or best[0] < 70.0:
+        fallback = _scan_variants(_preprocess_variants(img, adaptive=True), target)
+        if fallback and (best is None or fallback[0] > best[0]):
+            best = fallback
+
+    center = (best[1], best[2]) if best and best[0] >= 70.0 else None
+    _OCR_CENTER_CACHE[cache_key] = center
+    return center
 
 
 def _draw_marker(draw: ImageDraw.ImageDraw, x: int, y: int, r: int = 18):
@@ -139,10 +414,122 @@ def _draw_marker(draw: ImageDraw.ImageDraw, x: int, y: int, r: int = 18):
     draw.line((x, y - r, x, y + r), fill=(255, 255, 255, 255), width=3)
 
 
+# Offline gallery -> (floor, cx, cy) index so requests never need OCR.
+_GALLERY_INDEX_PATH = os.path.join(STATIC_DIR, "gallery_coords.json")
+_GALLERY_INDEX: Dict[str, Tuple[str, int, int]] = {}
+
+
+def _load_gallery_index() -> None:
+    try:
+        with open(_GALLERY_INDEX_PATH, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    for g, entry in (raw.get("galleries") or {}).items():
+        floor = str(entry.get("floor", "")).strip()
+        map_path = _find_floor_map_path(floor)
+        if not map_path:
+            continue
+        try:
+            mtime = os.path.getmtime(map_path)
+        except OSError:
+            continue
+        # skip entries built against an older version of the map asset
+        if entry.get("map_mtime") != mtime:
+            continue
+        try:
+            _GALLERY_INDEX[g] = (floor, int(entry["cx"]), int(entry["cy"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+
+
+def build_gallery_index(map_locations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """OCR every known gallery once and persist static/gallery_coords.json."""
+    galleries: Dict[str, Any] = {}
+
+    for floor_obj in map_locations:
+        floor = str(floor_obj.get("floor", "")).strip()
+        map_path = _find_floor_map_path(floor)
+        if not map_path:
+            continue
+        try:
+            mtime = os.path.getmtime(map_path)
+        except OSError:
+            continue
+
+        for block in (floor_obj.get("galleries") or []):
+            for n in (block.get("numbers") or []):
+                g = str(n).upper().strip()
+                if g in galleries:
+                    continue
+                center = _ocr_find_center(map_path, g)
+                if center is None:
+                    continue
+                galleries[g] = {
+                    "floor": floor,
+                    "cx": center[0],
+                    "cy": center[1],
+                    "map_mtime": mtime,
+                }
+                _GALLERY_INDEX[g] = (floor, center[0], center[1])
+
+    payload = {"galleries": galleries}
+    with open(_GALLERY_INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+    return payload
+
+
+_load_gallery_index()
+
+
+# map_path -> (mtime, decoded RGBA image); copy() is a memcpy vs a full PNG decode
+_BASE_IMAGE_CACHE: Dict[str, Tuple[float, Image.Image]] = {}
+
+
+def _load_base_image(map_path: str, mtime: float) -> Image.Image:
+    cached = _BASE_IMAGE_CACHE.get(map_path)
+    if cached is None or cached[0] != mtime:
+        img = Image.open(map_path).convert("RGBA")
+        img.load()
+        _BASE_IMAGE_CACHE[map_path] = (mtime, img)
+        cached = (mtime, img)
+    return cached[1].copy()
+
+
+_PRUNE_LOCK = threading.Lock()
+
+
+def _prune_gen_dir(max_files: int = 500) -> None:
+    """Keep only the most recently touched generated images."""
+    with _PRUNE_LOCK:
+        try:
+            entries = [(e.stat().st_mtime, e.path) for e in os.scandir(GEN_DIR) if e.is_file()]
+        except OSError:
+            return
+
+        if len(entries) <= max_files:
+            return
+
+        entries.sort(reverse=True)
+        for _, path in entries[max_files:]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+# (gallery, map mtime) -> URL of an already-rendered marker image
+_RENDERED_URL_CACHE: Dict[Tuple[str, float], str] = {}
+
+
 def get_gallery_map_image(gallery: str, map_locations: List[Dict[str, Any]]) -> Dict[str, Any]:
     g = str(gallery).upper().strip()
 
-    floor = _resolve_floor_for_gallery(g, map_locations)
+    indexed = _GALLERY_INDEX.get(g)
+
+    floor = indexed[0] if indexed else _resolve_floor_for_gallery(g, map_locations)
     if not floor:
         floor = "2"
 
@@ -152,18 +539,53 @@ def get_gallery_map_image(gallery: str, map_locations: List[Dict[str, Any]]) ->
         if not map_path:
             return {"image_url": None}
 
-    out_name = f"gallery_{g}_{uuid.uuid4().hex[:10]}.png"
+    try:
+        mtime = os.path.getmtime(map_path)
+    except OSError:
+        mtime = 0.0
+
+    cached = _RENDERED_URL_CACHE.get((g, mtime))
+    if cached:
+        return {"image_url": cached}
+
+    mtime_hash = hashlib.md5(f"{map_path}:{mtime}".encode("utf-8")).hexdigest()[:10]
+    out_name = f"gallery_{g}_{mtime_hash}.jpg"
     out_path = os.path.join(GEN_DIR, out_name)
+    rel = os.path.relpath(out_path, STATIC_DIR).replace("\\", "/")
+    url = f"/backend/static/{rel}"
 
-    center = _ocr_find_center(map_path, g)
+    if os.path.exists(out_path):
+        _RENDERED_URL_CACHE[(g, mtime)] = url
+        return {"image_url": url}
 
-    base = Image.open(map_path).convert("RGBA")
+    center = (indexed[1], indexed[2]) if indexed else _ocr_find_center(map_path, g)
+
+    # No marker to draw: the unmodified floor map is already on disk, so
+    # point at it directly instead of re-encoding an identical copy.
+    if center is None:
+        rel_map = os.path.relpath(map_path, STATIC_DIR).replace("\\", "/")
+        url = f"/backend/static/{rel_map}"
+        _RENDERED_URL_CACHE[(g, mtime)] = url
+        return {"image_url": url}
+
+    base = _load_base_image(map_path, mtime)
     draw = ImageDraw.Draw(base)
 
-    if center:
-        _draw_marker(draw, int(center[0]), int(center[1]), r=18)
+    _draw_marker(draw, int(center[0]), int(center[1]), r=18)
 
-    base.save(out_path, "PNG")
+    # JPEG encodes roughly 10x faster than Pillow's default-zlib PNG, and
+    # the flattened map doesn't need an alpha channel.
+    base.convert("RGB").save(out_path, "JPEG", quality=85)
 
-    rel = os.path.relpath(out_path, STATIC_DIR).replace("\\", "/")
-    return {"image_url": f"/backend/static/{rel}"}
\ No newline at end of file
+    _prune_gen_dir()
+
+    _RENDERED_URL_CACHE[(g, mtime)] = url
+    return {"image_url": url}
+
+
+if __name__ == "__main__":
+    # One-off index build: python map_utils.py
+    with open(os.path.join(BACKEND_DIR, "data", "map_locations.json"), "r", encoding="utf-8") as f:
+        _ml = json.load(f)
+    built = build_gallery_index(_ml)
+    print(f"Indexed {len(built['galleries'])} galleries -> {_GALLERY_INDEX_PATH}")
\ No newline at end of file